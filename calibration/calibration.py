@@ -1,6 +1,10 @@
 import cv2
-import glob
+import fnmatch
+import multiprocessing
+import os
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 # ----------------------------
@@ -23,19 +27,49 @@ PATTERNS_TO_TRY = [
     (11, 8),
 ]
 
+# When auto-detecting, after this many images, drop every other pattern if one
+# pattern hit at least PRUNE_MIN_SHARE of them.
+PRUNE_AFTER_IMAGES = 10
+PRUNE_MIN_SHARE = 0.8
+
+# SB detection runs on a copy downscaled by an integer factor so the long side is
+# about this many pixels; corners are refined back on the full-res image.
+DETECT_MAX_DIM = 960
+
+# Contrast-limited adaptive equalization used to preprocess every frame.
+# If colour preprocessing is ever reintroduced, apply this to the luma (Y) channel only.
+_CLAHE = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
 DEBUG_DIR = Path("debug")
 DEBUG_DIR.mkdir(exist_ok=True)
 # ----------------------------
 
+# Debug-image JPEG encodes run here so they don't hold up the detection loop
+_WRITE_POOL = ThreadPoolExecutor(max_workers=4)
+
 
-def try_find_corners(gray, pattern):
+def try_find_corners(gray, pattern, refine=True):
     """
     Robust chessboard corner detection.
+    With refine=False the cornerSubPix step is skipped -- enough to tell whether the
+    pattern is there, but the corners are not accurate enough for calibration.
     Returns: (found: bool, corners: np.ndarray or None)
     """
-    # Newer, more robust method
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 1e-3)
+
+    # Newer, more robust method. SB gets much slower with resolution, so run it on a
+    # downscaled copy (~960px on the long side) and refine the corners at full res.
     flags = cv2.CALIB_CB_EXHAUSTIVE | cv2.CALIB_CB_ACCURACY
-    found, corners = cv2.findChessboardCornersSB(gray, pattern, flags=flags)
+    scale = max(1, max(gray.shape) // DETECT_MAX_DIM)
+    if scale > 1:
+        small = cv2.resize(gray, None, fx=1 / scale, fy=1 / scale, interpolation=cv2.INTER_AREA)
+        found, corners = cv2.findChessboardCornersSB(small, pattern, flags=flags)
+        if found:
+            corners *= scale
+            if refine:
+                corners = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+    else:
+        found, corners = cv2.findChessboardCornersSB(gray, pattern, flags=flags)
 
     if found:
         return True, corners
@@ -45,25 +79,71 @@ def try_find_corners(gray, pattern):
     found_old, corners_old = cv2.findChessboardCorners(gray, pattern, flags=flags_old)
     if not found_old:
         return False, None
+    if not refine:
+        return True, corners_old
 
     # Refine to subpixel corners for the old method
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 1e-3)
     corners_refined = cv2.cornerSubPix(gray, corners_old, (11, 11), (-1, -1), criteria)
     return True, corners_refined
 
 
+def list_images(pattern):
+    """
+    Like sorted(glob.glob(pattern)) for a single-directory pattern, but via os.scandir
+    so no per-entry stat calls are made.
+    """
+    pattern = Path(pattern)
+    if not pattern.parent.is_dir():
+        return []
+    with os.scandir(pattern.parent) as it:
+        # Skip dotfiles, as glob does
+        return sorted(
+            entry.path for entry in it
+            if not entry.name.startswith(".") and fnmatch.fnmatch(entry.name, pattern.name)
+        )
+
+
+def _init_worker():
+    # Each worker runs one detector at a time; keep OpenCV (and any OpenMP runtime
+    # not yet initialised in this process) from spawning its own ncpu threads on top
+    # of the process pool. The main process keeps the defaults so calibrateCamera
+    # can still use every core.
+    cv2.setNumThreads(1)
+    os.environ["OMP_NUM_THREADS"] = "1"
+
+
+def _detect_one(fname, patterns):
+    """
+    Worker: load + preprocess one image and try each pattern in order.
+    Returns: (fname, image_size (w, h) or None if unreadable, {pattern: corners})
+    """
+    # The detector only needs luma; decoding straight to gray skips 2/3 of the
+    # JPEG colour work and the BGR->gray pass.
+    gray = cv2.imread(fname, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return fname, None, {}
+    image_size = (gray.shape[1], gray.shape[0])  # (w, h)
+
+    # Helpful preprocessing for difficult images: local (CLAHE) equalization copes
+    # with uneven lighting across matte prints. No blur -- SB smooths internally.
+    gray_proc = _CLAHE.apply(gray)
+
+    # Corners found here are used for calibration directly (there is no second pass),
+    # so they must be refined.
+    for pattern in patterns:
+        found, corners = try_find_corners(gray_proc, pattern, refine=True)
+        if found:
+            return fname, image_size, {pattern: corners}  # don’t double-count this image for multiple patterns
+
+    return fname, image_size, {}
+
+
 def main():
-    images = sorted(glob.glob(IMAGE_GLOB))
+    images = list_images(IMAGE_GLOB)
     print(f"Found {len(images)} images for calibration.")
     if not images:
         raise RuntimeError(f"No images found for glob: {IMAGE_GLOB}")
 
-    # Load first image to confirm resolution
-    first = cv2.imread(images[0])
-    if first is None:
-        raise RuntimeError(f"Could not read first image: {images[0]}")
-    image_size = (first.shape[1], first.shape[0])  # (w, h)
-
     # Decide which pattern to use
     if FORCE_PATTERN is not None:
         patterns = [FORCE_PATTERN]
@@ -72,34 +152,51 @@ def main():
         patterns = PATTERNS_TO_TRY
         print(f"Trying patterns: {patterns}")
 
-    # First pass: detect and count successes for each pattern
+    # Single detection pass: count successes for each pattern and remember the
+    # corners so we don't have to decode and detect every image a second time.
     pattern_success = {p: 0 for p in patterns}
-
-    for fname in images:
-        img = cv2.imread(fname)
-        if img is None:
-            continue
-
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        # Helpful preprocessing for difficult images:
-        # - slight blur reduces noise
-        # - histogram equalization helps contrast on matte prints
-        gray_proc = cv2.GaussianBlur(gray, (3, 3), 0)
-        gray_proc = cv2.equalizeHist(gray_proc)
-
-        for pattern in patterns:
-            found, corners = try_find_corners(gray_proc, pattern)
-            if found:
-                pattern_success[pattern] += 1
-
-                # Save a debug image showing corners for the FIRST time each file succeeds
-                out = img.copy()
-                cv2.drawChessboardCorners(out, pattern, corners, found)
-                out_path = DEBUG_DIR / f"{Path(fname).stem}_found_{pattern[0]}x{pattern[1]}.jpg"
-                cv2.imwrite(str(out_path), out)
-
-                break  # don’t double-count this image for multiple patterns
+    detections = {}  # fname -> {pattern: corners}
+    image_size = None  # (w, h), taken from the first readable image
+
+    # Run a short warm-up batch against every pattern; if one pattern clearly
+    # dominates it, only try that one on the remaining images.
+    active_patterns = patterns
+    warmup, rest = images[:PRUNE_AFTER_IMAGES], images[PRUNE_AFTER_IMAGES:]
+
+    # Workers may be started while debug-write threads are running, so spawn them
+    # rather than fork a multi-threaded process.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=ctx, initializer=_init_worker) as ex:
+        for batch in (warmup, rest):
+            for fname, size, hits in ex.map(_detect_one, batch, repeat(active_patterns), chunksize=1):
+                if size is None:
+                    print(f"Warning: could not read {fname}, skipping.")
+                    continue
+                if image_size is None:
+                    image_size = size
+
+                for pattern, corners in hits.items():
+                    pattern_success[pattern] += 1
+                    detections.setdefault(fname, {})[pattern] = corners
+
+                    # Save a debug image showing corners for the FIRST time each file succeeds.
+                    # Colour is only decoded here, for images that actually hit.
+                    out = cv2.imread(fname)
+                    cv2.drawChessboardCorners(out, pattern, corners, True)
+                    out_path = DEBUG_DIR / f"{Path(fname).stem}_found_{pattern[0]}x{pattern[1]}.jpg"
+                    _WRITE_POOL.submit(cv2.imwrite, str(out_path), out)
+
+            if batch is warmup and len(active_patterns) > 1 and rest:
+                leader = max(pattern_success, key=pattern_success.get)
+                if pattern_success[leader] >= PRUNE_MIN_SHARE * len(warmup):
+                    active_patterns = [leader]
+                    print(f"Pattern {leader} hit {pattern_success[leader]}/{len(warmup)} warm-up images; "
+                          "only trying it on the rest.")
+
+    _WRITE_POOL.shutdown(wait=True)
+
+    if image_size is None:
+        raise RuntimeError(f"Could not read any of the {len(images)} images for glob: {IMAGE_GLOB}")
 
     print("Success counts per pattern:")
     for p, c in pattern_success.items():
@@ -124,31 +221,15 @@ def main():
                 f"Debug images written to: {DEBUG_DIR.resolve()}"
             )
 
-    # Second pass: collect points for calibration using the chosen pattern
+    # Collect points for calibration using the chosen pattern (from cached detections)
     objp = np.zeros((pattern[0] * pattern[1], 3), np.float32)
     objp[:, :2] = np.mgrid[0:pattern[0], 0:pattern[1]].T.reshape(-1, 2)
     objp *= SQUARE_SIZE_M
 
-    objpoints = []
-    imgpoints = []
-    good = 0
-
-    for fname in images:
-        img = cv2.imread(fname)
-        if img is None:
-            continue
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        gray_proc = cv2.GaussianBlur(gray, (3, 3), 0)
-        gray_proc = cv2.equalizeHist(gray_proc)
-
-        found, corners = try_find_corners(gray_proc, pattern)
-        if not found:
-            continue
-
-        objpoints.append(objp)
-        imgpoints.append(corners)
-        good += 1
+    # Walk `images` (sorted) rather than the dict so the ordering is deterministic
+    imgpoints = [detections[f][pattern] for f in images if pattern in detections.get(f, {})]
+    good = len(imgpoints)
+    objpoints = [objp] * good
 
     if good < 3:
         raise RuntimeError(f"Only found corners in {good} images for pattern {pattern}. Need at least 3, ideally 20+.")
@@ -161,10 +242,10 @@ def main():
     print("Camera matrix:\n", camera_matrix)
     print("Dist coeffs:\n", dist_coeffs.ravel())
 
-    np.savez(
+    np.savez_compressed(
         OUTPUT_FILE,
-        camera_matrix=camera_matrix,
-        dist_coeffs=dist_coeffs,
+        camera_matrix=camera_matrix.astype(np.float32),
+        dist_coeffs=dist_coeffs.astype(np.float32),
         image_size=np.array(image_size, dtype=np.int32),
         checkerboard=np.array(pattern, dtype=np.int32),
         square_size_m=np.array([SQUARE_SIZE_M], dtype=np.float32),
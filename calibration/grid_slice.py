@@ -1,5 +1,7 @@
+import argparse
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ---------------- CONFIG ----------------
@@ -11,12 +13,25 @@ OUTPUT_SIZE = 1024
 MARGIN_PX = 136          # must match what you used in manual warp
 BOARD_N = 8              # 8x8 chessboard
 
+SQUARES_FILE = "squares.npz"  # all 64 crops as one (8, 8, sq, sq, 3) array, in OUT_DIR
+
+PNG_COMPRESSION = 1      # zlib level for --legacy crops; small tiles, so favour speed
+
 DRAW_LABELS = True       # set False if you only want the grid
 LABEL_ORIGIN = "a1"      # assumes bottom-left of warped image is a1 (standard chess view)
 # If your warp is rotated/flipped, we can adjust mapping easily.
 # ----------------------------------------
 
 
+# (file_idx, rank_idx) in the warped image -> algebraic square name, built once.
+# Real file comes from the warped rank (7 - rank_idx); real rank is the warped file (swap).
+_SQUARE_NAMES = {
+    (file_idx, rank_idx): f"{chr(ord('a') + (BOARD_N - 1) - rank_idx)}{file_idx + 1}"
+    for file_idx in range(BOARD_N)
+    for rank_idx in range(BOARD_N)
+}
+
+
 def square_name(file_idx: int, rank_idx: int) -> str:
     """
     Corrected mapping based on your observed corner correspondences.
@@ -28,16 +43,24 @@ def square_name(file_idx: int, rank_idx: int) -> str:
     Output:
       algebraic square name (a1..h8) in REAL board coordinates
     """
-    real_file_idx = (BOARD_N - 1) - rank_idx  # 7 - rank_idx
-    real_rank_idx = file_idx                  # swap
+    return _SQUARE_NAMES[(file_idx, rank_idx)]
+
 
-    file_char = chr(ord('a') + real_file_idx)
-    rank_char = str(real_rank_idx + 1)
-    return f"{file_char}{rank_char}"
 
+def write_png(out_path: Path, img) -> None:
+    """
+    Encode img to PNG and write it atomically (temp file + rename), so a crash
+    never leaves a truncated crop behind. Safe to call from worker threads.
+    """
+    ok, buf = cv2.imencode(".png", img, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+    if not ok:
+        raise RuntimeError(f"Could not encode {out_path}")
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    tmp_path.write_bytes(buf.tobytes())
+    tmp_path.replace(out_path)
 
 
-def main():
+def main(legacy: bool = False):
     img = cv2.imread(WARPED_IMAGE)
     if img is None:
         raise RuntimeError(f"Could not read {WARPED_IMAGE}")
@@ -57,17 +80,19 @@ def main():
     board_w = x1 - x0
     board_h = y1 - y0
 
-    # Use float step to avoid drift; convert each boundary independently
+    # Use float step to avoid drift; round each boundary independently (once, up front)
     step_x = board_w / BOARD_N
     step_y = board_h / BOARD_N
+    xs = np.round(x0 + np.arange(BOARD_N + 1) * step_x).astype(np.int32)
+    ys = np.round(y0 + np.arange(BOARD_N + 1) * step_y).astype(np.int32)
 
     # Draw outer border
     cv2.rectangle(overlay, (x0, y0), (x1, y1), (0, 255, 0), 2)
 
     # Draw grid lines
     for i in range(1, BOARD_N):
-        xi = int(round(x0 + i * step_x))
-        yi = int(round(y0 + i * step_y))
+        xi = int(xs[i])
+        yi = int(ys[i])
         cv2.line(overlay, (xi, y0), (xi, y1), (0, 255, 0), 1)
         cv2.line(overlay, (x0, yi), (x1, yi), (0, 255, 0), 1)
 
@@ -75,6 +100,13 @@ def main():
     out_dir = Path(OUT_DIR)
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    # All squares go into one contiguous array, indexed [rank_idx, file_idx].
+    # Rounded boundaries differ by a pixel here and there, so each crop is
+    # resized to a uniform sq x sq.
+    sq = board_w // BOARD_N
+    tiles = np.empty((BOARD_N, BOARD_N, sq, sq, 3), dtype=np.uint8)
+    names = np.empty((BOARD_N, BOARD_N), dtype="<U2")
+
     # Slice squares.
     #
     # IMPORTANT:
@@ -91,37 +123,51 @@ def main():
     #   x: [x0 + file_idx*step_x, x0 + (file_idx+1)*step_x]
     #   y: [y0 + (7-rank_idx)*step_y, y0 + (8-rank_idx)*step_y]
     #
-    for file_idx in range(BOARD_N):  # a..h
-        for rank_idx in range(BOARD_N):  # 1..8 (bottom->top)
-            # Compute crop bounds using rounded boundaries
-            xa = int(round(x0 + file_idx * step_x))
-            xb = int(round(x0 + (file_idx + 1) * step_x))
-
-            # invert rank for image y
-            img_rank = (BOARD_N - 1) - rank_idx
-            ya = int(round(y0 + img_rank * step_y))
-            yb = int(round(y0 + (img_rank + 1) * step_y))
-
-            crop = img[ya:yb, xa:xb]
-
-            name = square_name(file_idx, rank_idx)
-            out_path = out_dir / f"{name}.png"
-            cv2.imwrite(str(out_path), crop)
-
-            if DRAW_LABELS:
-                # draw label near the top-left of each square region on overlay
-                label_x = xa + 5
-                label_y = ya + 20
-                cv2.putText(
-                    overlay, name, (label_x, label_y),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2, cv2.LINE_AA
-                )
+    # With --legacy, each square is also written as its own PNG. PNG encoding
+    # dominates there; cv2.imencode releases the GIL, so a few threads overlap the writes.
+    writes = []
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        for file_idx in range(BOARD_N):  # a..h
+            for rank_idx in range(BOARD_N):  # 1..8 (bottom->top)
+                # Crop bounds from the precomputed rounded boundaries
+                xa, xb = int(xs[file_idx]), int(xs[file_idx + 1])
+
+                # invert rank for image y
+                img_rank = (BOARD_N - 1) - rank_idx
+                ya, yb = int(ys[img_rank]), int(ys[img_rank + 1])
+
+                crop = img[ya:yb, xa:xb]
+
+                name = square_name(file_idx, rank_idx)
+                tiles[rank_idx, file_idx] = cv2.resize(crop, (sq, sq), interpolation=cv2.INTER_AREA)
+                names[rank_idx, file_idx] = name
+
+                if legacy:
+                    out_path = out_dir / f"{name}.png"
+                    writes.append(ex.submit(write_png, out_path, crop))
+
+                if DRAW_LABELS:
+                    # draw label near the top-left of each square region on overlay
+                    label_x = xa + 5
+                    label_y = ya + 20
+                    cv2.putText(
+                        overlay, name, (label_x, label_y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2, cv2.LINE_AA
+                    )
+
+    for fut in writes:
+        fut.result()  # re-raise any write error
 
     # Save overlay
     Path(Path(OUT_OVERLAY).parent).mkdir(parents=True, exist_ok=True)
     cv2.imwrite(OUT_OVERLAY, overlay)
     print(f"Saved overlay: {OUT_OVERLAY}")
-    print(f"Saved 64 crops to: {out_dir.resolve()}")
+
+    squares_path = out_dir / SQUARES_FILE
+    np.savez_compressed(squares_path, tiles=tiles, names=names)
+    print(f"Saved {BOARD_N * BOARD_N} squares ({sq}x{sq}) to: {squares_path.resolve()}")
+    if legacy:
+        print(f"Saved {BOARD_N * BOARD_N} PNG crops to: {out_dir.resolve()}")
 
     # Optional: show overlay for quick sanity check
     cv2.imshow("Grid Overlay", overlay)
@@ -130,4 +176,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Slice a warped board image into its 64 squares')
+    parser.add_argument('--legacy', action='store_true',
+                        help='Also write each square as an individual PNG in OUT_DIR')
+    args = parser.parse_args()
+
+    main(legacy=args.legacy)
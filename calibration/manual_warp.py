@@ -17,6 +17,21 @@ clicked = []
 display = None
 base_img = None
 
+# (calib_file, w, h) -> (mapx, mapy) for cv2.remap; building the maps is the
+# expensive part of undistortion, so do it once per calibration/resolution.
+_undistort_maps = {}
+
+def get_undistort_maps(calib_file: str, w: int, h: int):
+    key = (calib_file, w, h)
+    if key not in _undistort_maps:
+        data = np.load(calib_file)
+        K = data["camera_matrix"]
+        D = data["dist_coeffs"]
+
+        newK, _ = cv2.getOptimalNewCameraMatrix(K, D, (w, h), alpha=0.0, newImgSize=(w, h))
+        _undistort_maps[key] = cv2.initUndistortRectifyMap(K, D, None, newK, (w, h), cv2.CV_16SC2)
+    return _undistort_maps[key]
+
 def load_and_maybe_undistort(path: str):
     img = cv2.imread(path)
     if img is None:
@@ -25,14 +40,11 @@ def load_and_maybe_undistort(path: str):
     if CALIB_FILE is None:
         return img
 
-    data = np.load(CALIB_FILE)
-    K = data["camera_matrix"]
-    D = data["dist_coeffs"]
-
     h, w = img.shape[:2]
-    newK, _ = cv2.getOptimalNewCameraMatrix(K, D, (w, h), alpha=0.0, newImgSize=(w, h))
-    undistorted = cv2.undistort(img, K, D, None, newK)
-    return undistorted
+    mapx, mapy = get_undistort_maps(CALIB_FILE, w, h)
+    # UMat lets OpenCV run this on the GPU via OpenCL when available (CPU otherwise)
+    undistorted = cv2.remap(cv2.UMat(img), mapx, mapy, cv2.INTER_LINEAR)
+    return undistorted.get()
 
 def redraw():
     global display
@@ -88,7 +100,7 @@ def main():
             ], dtype=np.float32)
 
             H = cv2.getPerspectiveTransform(src, dst)
-            warped = cv2.warpPerspective(base_img, H, (OUTPUT_SIZE, OUTPUT_SIZE))
+            warped = cv2.warpPerspective(cv2.UMat(base_img), H, (OUTPUT_SIZE, OUTPUT_SIZE)).get()
 
             Path(Path(OUT_WARPED).parent).mkdir(parents=True, exist_ok=True)
             cv2.imwrite(OUT_WARPED, warped)
@@ -1,8 +1,21 @@
 import cv2
+import numpy as np
 import os
 import argparse
 from datetime import datetime
 
+def draw_overlay(display_frame, frame, text, hint):
+    """Copy frame into a reusable display buffer and draw the status text on it."""
+    if display_frame is None or display_frame.shape != frame.shape:
+        display_frame = np.empty_like(frame)
+    np.copyto(display_frame, frame)
+
+    cv2.putText(display_frame, text, (30, 50), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+    cv2.putText(display_frame, hint, (30, 100), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+    return display_frame
+
 def detect_cameras(max_cameras=10):
     """Detect all available cameras."""
     available_cameras = []
@@ -11,6 +24,8 @@ def detect_cameras(max_cameras=10):
     for i in range(max_cameras):
         cap = cv2.VideoCapture(i)
         if cap.isOpened():
+            # Request MJPG so 1080p fits through USB at full frame rate (YUYV doesn't)
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
             # Set to 1080p
             cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
             cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
@@ -60,6 +75,7 @@ def preview_and_select_camera(cameras):
         for _ in range(10):
             cap.read()
         
+        display_frame = None
         while True:
             ret, frame = cap.read()
             
@@ -67,13 +83,9 @@ def preview_and_select_camera(cameras):
                 print(f"Error: Could not read from camera {index}")
                 break
             
-            # Add text overlay
-            display_frame = frame.copy()
+            # Add text overlay (into a buffer reused across frames)
             text = f"Camera {index} ({cam_info['width']}x{cam_info['height']})"
-            cv2.putText(display_frame, text, (30, 50), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-            cv2.putText(display_frame, "ENTER=Select  SPACE=Skip  ESC=Exit", (30, 100), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+            display_frame = draw_overlay(display_frame, frame, text, "ENTER=Select  SPACE=Skip  ESC=Exit")
             
             cv2.imshow(window_name, display_frame)
             
@@ -111,6 +123,8 @@ def capture_from_camera(camera_index):
         print(f"Error: Could not open camera {camera_index}")
         return []
     
+    # Request MJPG so 1080p fits through USB at full frame rate (YUYV doesn't)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
     # Set to 1080p
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
@@ -134,6 +148,7 @@ def capture_from_camera(camera_index):
     
     captured_frames = []
     capture_count = 0
+    display_frame = None
     
     try:
         while True:
@@ -143,13 +158,9 @@ def capture_from_camera(camera_index):
                 print(f"Error: Could not read from camera {camera_index}")
                 break
             
-            # Add text overlay
-            display_frame = frame.copy()
+            # Add text overlay (into a buffer reused across frames)
             text = f"Camera {camera_index} ({width}x{height}) - Captured: {capture_count}"
-            cv2.putText(display_frame, text, (30, 50), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-            cv2.putText(display_frame, "ENTER/SPACE=Capture  BACKSPACE=Exit", (30, 100), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+            display_frame = draw_overlay(display_frame, frame, text, "ENTER/SPACE=Capture  BACKSPACE=Exit")
             
             cv2.imshow(window_name, display_frame)
             
@@ -219,6 +230,7 @@ def capture_image(detect_mode=False, default_camera=4, calibration=False):
         cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
         
         capture_count = 0
+        display_frame = None
         
         try:
             while True:
@@ -228,13 +240,9 @@ def capture_image(detect_mode=False, default_camera=4, calibration=False):
                     print(f"Error: Could not read from camera {selected_index}")
                     break
                 
-                # Add text overlay
-                display_frame = frame.copy()
+                # Add text overlay (into a buffer reused across frames)
                 text = f"Camera {selected_index} ({width}x{height}) - Captured: {capture_count}"
-                cv2.putText(display_frame, text, (30, 50), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-                cv2.putText(display_frame, "ENTER/SPACE=Capture  BACKSPACE=Exit", (30, 100), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+                display_frame = draw_overlay(display_frame, frame, text, "ENTER/SPACE=Capture  BACKSPACE=Exit")
                 
                 cv2.imshow(window_name, display_frame)
                 